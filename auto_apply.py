@@ -1,19 +1,39 @@
 from selenium import webdriver
+from selenium.common.exceptions import InvalidSessionIdException, WebDriverException
+from selenium.webdriver.chrome.remote_connection import ChromeRemoteConnection
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.common.driver_finder import DriverFinder
+from selenium.webdriver.remote.client_config import ClientConfig
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 import pandas as pd
 from datetime import datetime
 import logging
-from typing import Dict, List, Set
-import os
+from typing import Dict, List, Optional
+import queue
+from concurrent.futures import ThreadPoolExecutor
 
 class JobApplicant:
-    def __init__(self, resume_path: str):
+    def __init__(self, resume_path: str, pool_size: int = 1):
         self.resume_path = resume_path
         self.logger = logging.getLogger(__name__)
         self.setup_logging()
 
+        # Browsers are started lazily and reused across applications.
+        # Each slot in the pool holds either a live driver or None.
+        self.pool_size = pool_size
+        self.connection_pool_maxsize = 20  # HTTP connections per driver
+        self._pool = queue.Queue()
+        for _ in range(pool_size):
+            self._pool.put(None)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
     def setup_logging(self):
         logging.basicConfig(
             filename='job_applications.log',
@@ -21,12 +41,99 @@ class JobApplicant:
             format='%(asctime)s - %(levelname)s - %(message)s'
         )
 
+    def _create_driver(self) -> webdriver.Remote:
+        """
+        Start a new Chrome instance
+        The chromedriver connection is built by hand so the urllib3 pool can
+        grow past Selenium's default of a single connection.
+        """
+        options = webdriver.ChromeOptions()
+        service = Service()
+
+        # Locate chromedriver and Chrome (via Selenium Manager) the same way
+        # webdriver.Chrome() does before starting the service
+        finder = DriverFinder(service, options)
+        if finder.get_browser_path():
+            options.binary_location = finder.get_browser_path()
+            options.browser_version = None
+        service.path = service.env_path() or finder.get_driver_path()
+        service.start()
+
+        try:
+            client_config = ClientConfig(
+                remote_server_addr=service.service_url,
+                keep_alive=True,
+                # Selenium reads the pool manager kwargs from this nested key
+                init_args_for_pool_manager={
+                    "init_args_for_pool_manager": {"maxsize": self.connection_pool_maxsize}
+                },
+            )
+            executor = ChromeRemoteConnection(
+                remote_server_addr=service.service_url,
+                keep_alive=True,
+                client_config=client_config,
+            )
+            driver = webdriver.Remote(command_executor=executor, options=options)
+        except Exception:
+            service.stop()
+            raise
+
+        # Like ChromiumDriver: chromedriver runs locally, so file inputs take
+        # the local resume path instead of uploading it over /se/file
+        driver._is_remote = False
+        driver.service = service
+        return driver
+
+    def _quit_driver(self, driver: webdriver.Remote) -> None:
+        try:
+            driver.quit()
+        except WebDriverException as e:
+            self.logger.warning(f"Error shutting down browser: {str(e)}")
+        finally:
+            driver.service.stop()
+
+    def _reset_driver(self, driver: webdriver.Remote) -> Optional[webdriver.Remote]:
+        """
+        Clear browser state between applications
+        Returns: the driver, or None if its session was lost
+        """
+        try:
+            driver.delete_all_cookies()
+            driver.get("about:blank")
+            return driver
+        except WebDriverException as e:
+            self.logger.warning(f"Browser session lost, will restart: {str(e)}")
+            self._quit_driver(driver)
+            return None
+
+    def _acquire_driver(self) -> webdriver.Remote:
+        """Take a driver from the pool, starting a browser if the slot is empty"""
+        driver = self._pool.get()
+        if driver is None:
+            try:
+                driver = self._create_driver()
+            except Exception:
+                self._pool.put(None)
+                raise
+        return driver
+
+    def _release_driver(self, driver: Optional[webdriver.Remote]) -> None:
+        """Reset a driver and return it to the pool"""
+        if driver is not None:
+            driver = self._reset_driver(driver)
+        self._pool.put(driver)
+
     def apply_to_job(self, job: Dict) -> bool:
         """
         Attempts to apply to a job posting
         Returns: bool indicating success/failure
         """
-        driver = webdriver.Chrome()
+        try:
+            driver = self._acquire_driver()
+        except Exception as e:
+            self.logger.error(f"Failed to start browser for {job['url']}: {str(e)}")
+            return False
+
         success = False
         
         try:
@@ -52,78 +159,41 @@ class JobApplicant:
             success = True
             self.logger.info(f"Successfully applied to {job['title']} at {job['company']}")
             
+        except InvalidSessionIdException as e:
+            self.logger.error(f"Failed to apply to {job['url']}: browser session lost: {str(e)}")
+            self._quit_driver(driver)
+            driver = None
+
         except Exception as e:
             self.logger.error(f"Failed to apply to {job['url']}: {str(e)}")
             
         finally:
-            driver.quit()
+            self._release_driver(driver)
             return success
 
-def save_to_csv(jobs: List[Dict], filename: str = None):
+    def apply_to_jobs(self, jobs: List[Dict]) -> List[bool]:
+        """
+        Apply to several jobs, sharing the browser pool between worker threads
+        Returns: list of success flags in the same order as jobs
+        """
+        with ThreadPoolExecutor(max_workers=self.pool_size) as executor:
+            return list(executor.map(self.apply_to_job, jobs))
+
+    def close(self) -> None:
+        """Shut down every browser in the pool"""
+        for _ in range(self.pool_size):
+            driver = self._pool.get()
+            if driver is not None:
+                self._quit_driver(driver)
+            self._pool.put(None)
+
+def save_jobs(jobs: List[Dict], filename: str = None):
     if filename is None:
         filename = f"job_listings_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
     
     df = pd.DataFrame(jobs)
-    df.to_csv(filename, index=False)
+    if filename.endswith(".parquet"):
+        df.to_parquet(filename, engine='pyarrow', compression='zstd', index=False)
+    else:
+        df.to_csv(filename, index=False)
     logging.info(f"Saved {len(jobs)} jobs to {filename}")
-
-class JobManager:
-    def __init__(self, csv_path: str = "job_listings.csv"):
-        self.csv_path = csv_path
-        self.temp_path = f"{csv_path}.temp"
-        
-    def get_existing_job_ids(self) -> Set[str]:
-        """Get set of existing job IDs from CSV file"""
-        if not os.path.exists(self.csv_path):
-            return set()
-        
-        try:
-            df = pd.read_csv(self.csv_path)
-            return set(df['job_id'].values)
-        except Exception as e:
-            logging.error(f"Error reading existing jobs: {e}")
-            return set()
-
-    def save_new_jobs(self, jobs: List[Dict]) -> None:
-        """
-        Safely save new jobs to CSV file, avoiding duplicates
-        """
-        existing_ids = self.get_existing_job_ids()
-        
-        # Filter out duplicates
-        new_jobs = [
-            job for job in jobs 
-            if job['job_id'] not in existing_ids
-        ]
-        
-        if not new_jobs:
-            logging.info("No new jobs to save")
-            return
-
-        try:
-            # Create new DataFrame with new jobs
-            new_df = pd.DataFrame(new_jobs)
-            
-            if os.path.exists(self.csv_path):
-                # Read existing CSV and concatenate with new jobs
-                existing_df = pd.read_csv(self.csv_path)
-                combined_df = pd.concat([existing_df, new_df], ignore_index=True)
-            else:
-                combined_df = new_df
-
-            # Save to temporary file first
-            combined_df.to_csv(self.temp_path, index=False)
-            
-            # If successful, rename temp file to actual file
-            if os.path.exists(self.csv_path):
-                os.remove(self.csv_path)
-            os.rename(self.temp_path, self.csv_path)
-            
-            logging.info(f"Successfully saved {len(new_jobs)} new jobs to {self.csv_path}")
-            
-        except Exception as e:
-            logging.error(f"Error saving jobs to CSV: {e}")
-            # Clean up temp file if it exists
-            if os.path.exists(self.temp_path):
-                os.remove(self.temp_path)
-
@@ -1,17 +1,37 @@
-import requests
+import aiohttp
+import asyncio
+import hashlib
+import math
 import os
+import time
 from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 from typing import List, Dict, Optional
+from urllib.parse import urlsplit
 from abc import ABC, abstractmethod
 from dotenv import load_dotenv
-import time  # Add this import
-import pandas as pd
+
+from utils import backoff
 
 load_dotenv()
 
 class JobFetcher(ABC):
     @abstractmethod
-    def fetch_jobs(self, what: str, max_results: int = 10000, where: Optional[str] = None) -> List[Dict]:
+    async def fetch_jobs(
+        self,
+        session: aiohttp.ClientSession,
+        what: str,
+        max_results: int = 10000,
+        where: Optional[str] = None,
+        since: Optional[datetime] = None
+    ) -> List[Dict]:
+        """
+        Fetch jobs as a list of job dicts, one per posting.
+        If since is given, fetchers may limit the search to recent postings;
+        older jobs can still be returned and are deduplicated on save.
+        Fetchers must collect results into a list and never build or append
+        to DataFrames; JobManager builds a single DataFrame once per save.
+        """
         pass
 
 class AdzunaJobFetcher(JobFetcher):
@@ -21,54 +41,128 @@ class AdzunaJobFetcher(JobFetcher):
         self.base_url = "https://api.adzuna.com/v1/api/jobs"
         self.country = "us"  # or 'us', 'ca', etc.
         self.results_per_page = 50  # Adzuna's max per page
-        self.request_delay = 1    # Delay between requests in seconds
-        self.retry_delay = 60     # Delay when rate limited in seconds
+        self.request_delay = 1    # Base backoff before retrying a failed request in seconds
+        self.retry_delay = 60     # Base backoff when rate limited without Retry-After in seconds
+        self.max_backoff = 300    # Cap on any single backoff in seconds
         self.max_retries = 3      # Maximum number of retry attempts
+        self.max_concurrency = 64 # Maximum number of pages fetched at once
+        self._next_request_at: Dict[str, float] = {}  # Per-host monotonic time
 
-    def _make_api_request(self, url: str, params: Dict) -> Dict:
+    def _rate_limit_wait(self, headers, rate_limited: bool = False) -> Optional[float]:
         """
-        Make API request with rate limiting handling
+        Seconds the server asks us to wait before the next request, if any
         """
+        retry_after = headers.get("Retry-After")
+        if retry_after:
+            try:
+                return max(0.0, float(retry_after))
+            except ValueError:
+                try:
+                    retry_at = parsedate_to_datetime(retry_after)
+                    return max(0.0, retry_at.timestamp() - time.time())
+                except (TypeError, ValueError):
+                    pass
+
+        remaining = headers.get("X-RateLimit-Remaining")
+        reset = headers.get("X-RateLimit-Reset")
+        if reset and (rate_limited or remaining == "0"):
+            try:
+                reset = float(reset)
+            except ValueError:
+                return None
+            # Reset is either an epoch timestamp or a number of seconds
+            if reset > 1e9:
+                reset -= time.time()
+            return max(0.0, reset)
+
+        return None
+
+    async def _wait_for_host(self, host: str) -> None:
+        delay = self._next_request_at.get(host, 0) - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def _defer_host(self, host: str, wait_time: float) -> None:
+        next_ok = time.monotonic() + wait_time
+        self._next_request_at[host] = max(self._next_request_at.get(host, 0), next_ok)
+
+    async def _make_api_request(self, session: aiohttp.ClientSession, url: str, params: Dict) -> Dict:
+        """
+        Make API request, waiting only as long as the server's rate limit headers require
+        """
+        host = urlsplit(url).netloc
+
         for attempt in range(self.max_retries):
             try:
-                # Add delay between requests
-                if attempt > 0:
-                    time.sleep(self.request_delay)
-                
-                response = requests.get(url, params=params)
+                await self._wait_for_host(host)
                 
-                # Handle rate limiting
-                if response.status_code == 429:
-                    wait_time = self.retry_delay
-                    print(f"Rate limit reached. Waiting {wait_time} seconds... (Attempt {attempt + 1}/{self.max_retries})")
-                    time.sleep(wait_time)
-                    continue
-                
-                response.raise_for_status()
-                return response.json()
+                async with session.get(url, params=params) as response:
+                    # Handle rate limiting
+                    if response.status == 429:
+                        wait_time = self._rate_limit_wait(response.headers, rate_limited=True)
+                        if wait_time is None:
+                            wait_time = backoff(attempt, base=self.retry_delay, cap=self.max_backoff)
+                        print(f"Rate limit reached. Waiting {wait_time:.0f} seconds... (Attempt {attempt + 1}/{self.max_retries})")
+                        self._defer_host(host, wait_time)
+                        continue
+                    
+                    wait_time = self._rate_limit_wait(response.headers)
+                    if wait_time:
+                        self._defer_host(host, wait_time)
+
+                    response.raise_for_status()
+                    return await response.json()
                 
-            except requests.exceptions.RequestException as e:
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
                 if attempt < self.max_retries - 1:
+                    wait_time = backoff(attempt, base=self.request_delay, cap=self.max_backoff)
                     print(f"Request error: {e}")
-                    print(f"Retrying in {self.request_delay} seconds... (Attempt {attempt + 1}/{self.max_retries})")
-                    time.sleep(self.request_delay)
+                    print(f"Retrying in {wait_time:.2f} seconds... (Attempt {attempt + 1}/{self.max_retries})")
+                    await asyncio.sleep(wait_time)
                 else:
                     raise
 
         raise Exception("Max retries exceeded")
 
-    def fetch_jobs(
+    def _parse_job(self, job: Dict) -> Dict:
+        """
+        Convert a raw Adzuna result into our job record
+        """
+        title = job.get("title")
+        company = job.get("company", {}).get("display_name")
+        location = job.get("location", {}).get("display_name")
+
+        # Generate a fixed-width unique identifier for each job
+        job_id = hashlib.blake2b(
+            f"{company}|{title}|{location}".encode(), digest_size=8
+        ).hexdigest()
+        
+        return {
+            "job_id": job_id,
+            "title": title,
+            "company": company,
+            "location": location,
+            "description": job.get("description"),
+            "salary_min": job.get("salary_min"),
+            "salary_max": job.get("salary_max"),
+            "url": job.get("redirect_url"),
+            "created": job.get("created"),
+            "source": "Adzuna",
+            "fetched_at": datetime.now(timezone.utc).isoformat()
+        }
+
+    async def fetch_jobs(
         self, 
+        session: aiohttp.ClientSession,
         what: str, 
         max_results: int, 
-        where: Optional[str] = None  # Changed to None to fetch all jobs
+        where: Optional[str] = None,  # Changed to None to fetch all jobs
+        since: Optional[datetime] = None
     ) -> List[Dict]:
         """
-        Fetch all available jobs from Adzuna API with rate limiting
+        Fetch all available jobs from Adzuna API, requesting pages concurrently.
+        If since is given, only jobs created since then are requested.
         """
-        all_jobs = []
-        page = 1
-        
         params = {
             "app_id": self.app_id,
             "app_key": self.app_key,
@@ -80,59 +174,55 @@ class AdzunaJobFetcher(JobFetcher):
         if where:
             params["where"] = where
 
-        try:
-            while True:  # Continue until no more results
+        if since:
+            # Adzuna filters by whole days, so round up; the overlap with
+            # already stored jobs is handled by JobManager's dedupe
+            days_old = (datetime.now(timezone.utc) - since).total_seconds() / 86400
+            params["max_days_old"] = max(1, math.ceil(days_old))
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def fetch_page(page: int) -> Dict:
+            async with semaphore:
                 print(f"Fetching page {page}...")
-                
-                try:
-                    data = self._make_api_request(
-                        f"{self.base_url}/{self.country}/search/{page}",
-                        params
-                    )
-
-                    results = data.get("results", [])
-                    if not results:  # No more results available
-                        print("No more results available")
-                        break
-
-                    for job in results:
-                        # Generate a unique identifier for each job
-                        job_id = f"{job.get('company', {}).get('display_name')}_{job.get('title')}_{job.get('location', {}).get('display_name')}"
-                        
-                        all_jobs.append({
-                            "job_id": job_id,
-                            "title": job.get("title"),
-                            "company": job.get("company", {}).get("display_name"),
-                            "location": job.get("location", {}).get("display_name"),
-                            "description": job.get("description"),
-                            "salary_min": job.get("salary_min"),
-                            "salary_max": job.get("salary_max"),
-                            "url": job.get("redirect_url"),
-                            "created": job.get("created"),
-                            "source": "Adzuna",
-                            "fetched_at": datetime.now(timezone.utc).isoformat()
-                        })
-
-                    print(f"Fetched {len(all_jobs)} jobs so far...")
-
-                    # Break if we've reached max_results (if specified)
-                    if max_results and len(all_jobs) >= max_results:
-                        print(f"Reached maximum requested results: {max_results}")
-                        break
-
-                    # Add delay between successful page fetches
-                    time.sleep(self.request_delay)
-                    page += 1
-
-                except Exception as e:
-                    print(f"Error fetching page {page}: {e}")
-                    break
-
-            return all_jobs[:max_results] if max_results else all_jobs
+                return await self._make_api_request(
+                    session,
+                    f"{self.base_url}/{self.country}/search/{page}",
+                    params
+                )
 
+        # The first page tells us how many results there are in total
+        try:
+            data = await fetch_page(1)
         except Exception as e:
-            print(f"Error in fetch_jobs: {e}")
-            return all_jobs  # Return any jobs we've collected so far
+            print(f"Error fetching page 1: {e}")
+            return []
+
+        all_jobs = [self._parse_job(job) for job in data.get("results", [])]
+        if not all_jobs:  # No results available
+            print("No results available")
+            return all_jobs
+
+        total = data.get("count", len(all_jobs))
+        if max_results:
+            total = min(total, max_results)
+        num_pages = math.ceil(total / self.results_per_page)
+        print(f"Fetching {num_pages} pages for {total} jobs...")
+
+        pages = range(2, num_pages + 1)
+        results = await asyncio.gather(
+            *(fetch_page(page) for page in pages),
+            return_exceptions=True
+        )
+
+        for page, result in zip(pages, results):
+            if isinstance(result, BaseException):
+                print(f"Error fetching page {page}: {result}")
+                continue
+            all_jobs.extend(self._parse_job(job) for job in result.get("results", []))
+
+        print(f"Fetched {len(all_jobs)} jobs")
+        return all_jobs[:max_results] if max_results else all_jobs
 
 class JobFetchManager:
     def __init__(self):
@@ -140,14 +230,47 @@ class JobFetchManager:
             AdzunaJobFetcher(),
             # Add more job fetchers here
         ]
+        self.connections_per_host = 64
+        # Keep idle connections (and their TLS sessions) open across rate
+        # limit pauses so later pages don't pay for a new handshake
+        self.keepalive_timeout = 75  # seconds, aiohttp's default is 15
+        self.dns_cache_ttl = 300     # seconds
+
+    def fetch_all_jobs(
+        self,
+        what: str,
+        max_results: int = 10000,
+        where: Optional[str] = None,
+        since: Optional[datetime] = None
+    ) -> List[Dict]:
+        return asyncio.run(self._fetch_all_jobs(what, max_results, where, since))
+
+    async def _fetch_all_jobs(
+        self,
+        what: str,
+        max_results: int,
+        where: Optional[str],
+        since: Optional[datetime]
+    ) -> List[Dict]:
+        connector = aiohttp.TCPConnector(
+            limit_per_host=self.connections_per_host,
+            keepalive_timeout=self.keepalive_timeout,
+            ttl_dns_cache=self.dns_cache_ttl
+        )
+        async with aiohttp.ClientSession(connector=connector) as session:
+            results = await asyncio.gather(
+                *(fetcher.fetch_jobs(session, what, max_results, where, since) for fetcher in self.fetchers),
+                return_exceptions=True
+            )
 
-    def fetch_all_jobs(self, what: str, max_results: int = 10000, where: Optional[str] = None) -> List[Dict]:
         all_jobs = []
-        for fetcher in self.fetchers:
-            try:
-                jobs = fetcher.fetch_jobs(what, max_results, where)
-                all_jobs.extend(jobs)
-            except Exception as e:
-                print(f"Error with {fetcher.__class__.__name__}: {e}")
+        for fetcher, jobs in zip(self.fetchers, results):
+            if isinstance(jobs, BaseException):
+                print(f"Error with {fetcher.__class__.__name__}: {jobs}")
+                continue
+            if not isinstance(jobs, list):
+                print(f"Error with {fetcher.__class__.__name__}: fetch_jobs must return a list of dicts, got {type(jobs).__name__}")
+                continue
+            all_jobs.extend(jobs)
         
         return all_jobs
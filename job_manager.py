@@ -1,64 +1,231 @@
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 import logging
 import os
-from typing import List, Dict
+import uuid
+from typing import List, Dict, Optional
 from datetime import datetime
 
+# Every Parquet part file is written with this schema, so batches where a
+# column is all-null or missing still match the rest of the dataset
+JOB_SCHEMA = pa.schema([
+    ("job_id", pa.string()),
+    ("title", pa.string()),
+    ("company", pa.string()),
+    ("location", pa.string()),
+    ("description", pa.string()),
+    ("salary_min", pa.float64()),
+    ("salary_max", pa.float64()),
+    ("url", pa.string()),
+    ("created", pa.string()),
+    ("source", pa.string()),
+    ("fetched_at", pa.string()),
+    ("score", pa.float64()),
+    ("matching_skills", pa.list_(pa.string())),
+    ("missing_skills", pa.list_(pa.string())),
+    ("error", pa.string()),
+])
+
+def _is_missing(value) -> bool:
+    return value is None or value is pd.NA or (isinstance(value, float) and value != value)
+
+def _as_string_list(value) -> Optional[List[str]]:
+    """Coerce a skills value to a list of strings, wrapping scalars"""
+    if isinstance(value, (list, tuple)) or hasattr(value, 'tolist'):
+        return [str(item) for item in list(value) if not _is_missing(item)]
+    if _is_missing(value):
+        return None
+    return [str(value)]
+
+def _coerce_to_schema(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Convert a batch of jobs to plain columns matching JOB_SCHEMA, coercing
+    loosely typed values per column so one bad row can't fail the batch
+    """
+    coerced = pd.DataFrame(index=df.index)
+    for field in JOB_SCHEMA:
+        if field.name not in df.columns:
+            coerced[field.name] = None
+            continue
+        values = df[field.name].astype(object)
+        if pa.types.is_floating(field.type):
+            coerced[field.name] = pd.to_numeric(
+                values.map(lambda v: None if _is_missing(v) else v), errors='coerce'
+            ).astype('float64')
+        elif pa.types.is_list(field.type):
+            coerced[field.name] = values.map(_as_string_list)
+        else:
+            coerced[field.name] = values.map(lambda v: None if _is_missing(v) else str(v))
+    return coerced
+
 class JobManager:
-    def __init__(self, csv_path: str = "job_listings.csv"):
-        self.csv_path = csv_path
-        self.temp_path = f"{csv_path}.temp"
-        
-    def get_existing_job_ids(self) -> set:
-        """Get set of existing job IDs from CSV file"""
-        if not os.path.exists(self.csv_path):
-            return set()
-        
+    def __init__(self, store_path: str = "job_listings.csv"):
+        """
+        Job store backed by a CSV file or, for a ".parquet" path, a directory
+        of Parquet part files (one per save)
+        """
+        self.store_path = store_path
+        self.use_parquet = store_path.endswith(".parquet")
+        self.temp_path = f"{store_path}.temp"
+        self._existing = None  # (store mtime, DataFrame) from the last read
+
+    def _store_exists(self) -> bool:
+        if self.use_parquet:
+            return os.path.isdir(self.store_path) and any(
+                name.endswith(".parquet") for name in os.listdir(self.store_path)
+            )
+        return os.path.exists(self.store_path)
+
+    def _load_existing(self) -> Optional[pd.DataFrame]:
+        """
+        Load the job_id and created columns of the job store (None if empty).
+        The last read is reused while the store is unchanged on disk.
+        """
+        if not self._store_exists():
+            return None
+
+        mtime = os.stat(self.store_path).st_mtime_ns
+        if self._existing is not None and self._existing[0] == mtime:
+            return self._existing[1]
+
+        columns = ['job_id', 'created']
         try:
-            df = pd.read_csv(self.csv_path)
-            return set(df['job_id'].values)
+            if self.use_parquet:
+                df = pd.read_parquet(
+                    self.store_path,
+                    columns=columns,
+                    dtype_backend='pyarrow'
+                )
+            else:
+                # Hex IDs can look numeric, so parse these columns as text. The
+                # pyarrow engine infers types before applying dtype, so use C.
+                df = pd.read_csv(
+                    self.store_path,
+                    usecols=columns,
+                    dtype={column: 'string[pyarrow]' for column in columns},
+                    engine='c'
+                )
         except Exception as e:
             logging.error(f"Error reading existing jobs: {e}")
-            return set()
+            return None
+
+        self._existing = (mtime, df)
+        return df
+
+    def get_last_created(self) -> Optional[datetime]:
+        """Get the creation time of the newest stored job (None if unknown)"""
+        existing_df = self._load_existing()
+        if existing_df is None:
+            return None
+
+        max_created = pd.to_datetime(existing_df['created'], utc=True, errors='coerce').max()
+        return None if pd.isna(max_created) else max_created.to_pydatetime()
 
     def save_new_jobs(self, jobs: List[Dict]) -> None:
         """
-        Safely save new jobs to CSV file, avoiding duplicates
+        Safely save new jobs to the job store, avoiding duplicates
         """
-        existing_ids = self.get_existing_job_ids()
-        
-        # Filter out duplicates
-        new_jobs = [
-            job for job in jobs 
-            if job['job_id'] not in existing_ids
-        ]
-        
-        if not new_jobs:
+        if not jobs:
+            logging.info("No new jobs to save")
+            return
+
+        existing_df = self._load_existing()
+
+        # Filter out duplicates within the batch and against the saved jobs.
+        # Arrow-backed columns keep strings out of Python objects and let
+        # isin run on Arrow's kernels.
+        new_df = pd.DataFrame(jobs).convert_dtypes(dtype_backend='pyarrow')
+        new_df = new_df.drop_duplicates('job_id')
+        if existing_df is not None:
+            new_df = new_df[~new_df['job_id'].isin(existing_df['job_id'])]
+
+        if new_df.empty:
             logging.info("No new jobs to save")
             return
 
+        if self.use_parquet:
+            self._append_parquet(new_df)
+        else:
+            self._append_csv(new_df)
+
+    def _append_parquet(self, new_df: pd.DataFrame) -> None:
+        """
+        Write new jobs as a new part file of the Parquet dataset
+        """
+        os.makedirs(self.store_path, exist_ok=True)
+        part_name = f"part-{datetime.now().strftime('%Y%m%d_%H%M%S')}-{uuid.uuid4().hex[:8]}.parquet"
+        part_path = os.path.join(self.store_path, part_name)
+        # Dot-prefixed files are ignored by Parquet dataset readers
+        temp_path = os.path.join(self.store_path, f".{part_name}.temp")
+
         try:
-            # Create new DataFrame with new jobs
-            new_df = pd.DataFrame(new_jobs)
-            
-            if os.path.exists(self.csv_path):
-                # Read existing CSV and concatenate with new jobs
-                existing_df = pd.read_csv(self.csv_path)
-                combined_df = pd.concat([existing_df, new_df], ignore_index=True)
-            else:
-                combined_df = new_df
+            table = pa.Table.from_pandas(
+                _coerce_to_schema(new_df), schema=JOB_SCHEMA, preserve_index=False
+            )
+            # Drop the embedded pandas metadata so readers use the Arrow
+            # schema rather than this batch's pandas dtypes
+            table = table.replace_schema_metadata(None)
+
+            # Save to temporary file first
+            pq.write_table(table, temp_path, compression='zstd')
+
+            # Check the part reads back with the dataset's schema before adding it
+            if not pq.read_schema(temp_path).equals(JOB_SCHEMA):
+                raise ValueError("Written part does not match the job schema")
+
+            # If successful, rename temp file into the dataset
+            os.replace(temp_path, part_path)
+
+            logging.info(f"Successfully saved {len(new_df)} new jobs to {self.store_path}")
+
+        except Exception as e:
+            logging.error(f"Error saving jobs to Parquet: {e}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def _append_csv(self, new_df: pd.DataFrame) -> None:
+        try:
+            header = not os.path.exists(self.store_path)
+            if not header:
+                columns = pd.read_csv(self.store_path, nrows=0).columns
+                if not set(new_df.columns) <= set(columns):
+                    # New columns can't be appended under the old header
+                    self._rewrite_with_new_columns(new_df)
+                    return
+                # Append in the existing column order
+                new_df = new_df.reindex(columns=columns)
+
+            new_df.to_csv(self.store_path, mode='a', header=header, index=False)
+
+            logging.info(f"Successfully saved {len(new_df)} new jobs to {self.store_path}")
+
+        except Exception as e:
+            logging.error(f"Error saving jobs to CSV: {e}")
+
+    def _rewrite_with_new_columns(self, new_df: pd.DataFrame) -> None:
+        """
+        Rewrite the CSV with a widened header when new jobs add columns
+        """
+        try:
+            # Read everything as text so stored rows are rewritten unchanged
+            existing_df = pd.read_csv(
+                self.store_path,
+                dtype='string[pyarrow]',
+                keep_default_na=False,
+                engine='c'
+            )
+            combined_df = pd.concat([existing_df, new_df], ignore_index=True)
 
             # Save to temporary file first
             combined_df.to_csv(self.temp_path, index=False)
-            
+
             # If successful, rename temp file to actual file
-            if os.path.exists(self.csv_path):
-                os.remove(self.csv_path)
-            os.rename(self.temp_path, self.csv_path)
-            
-            logging.info(f"Successfully saved {len(new_jobs)} new jobs to {self.csv_path}")
-            
+            os.replace(self.temp_path, self.store_path)
+
+            logging.info(f"Successfully saved {len(new_df)} new jobs to {self.store_path}")
+
         except Exception as e:
             logging.error(f"Error saving jobs to CSV: {e}")
             if os.path.exists(self.temp_path):
-                os.remove(self.temp_path) 
\ No newline at end of file
+                os.remove(self.temp_path)
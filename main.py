@@ -1,12 +1,14 @@
+import asyncio
 import schedule
 import time
-from typing import Dict
+from typing import Dict, List
 import logging
 from pathlib import Path
 from dotenv import load_dotenv
 from datetime import datetime, timezone
 import docx
 
+from match_cache import MatchCache
 from resume_match import ResumeMatchEngine
 from job_fetch import JobFetchManager
 from job_manager import JobManager
@@ -16,9 +18,15 @@ load_dotenv()
 class JobSearchPipeline:
     def __init__(self, config: Dict):
         self.config = config
-        self.resume_matcher = ResumeMatchEngine()
+        self.resume_matcher = ResumeMatchEngine(
+            cache=MatchCache(config.get('match_cache_path', "match_cache.db")),
+            requests_per_minute=config.get('llm_requests_per_minute')
+        )
         self.job_fetcher = JobFetchManager()
-        self.job_manager = JobManager(config['output_csv'])
+        self.job_manager = JobManager(config['output_path'])
+        # The async LLM client is bound to the loop it was first used on,
+        # so reuse one loop across scheduled runs
+        self.match_loop = asyncio.new_event_loop()
         
         # Load resume text directly from Word document
         self.resume_text = self._extract_text_from_docx(config['resume_path'])
@@ -28,42 +36,47 @@ class JobSearchPipeline:
         doc = docx.Document(docx_path)
         return '\n'.join([paragraph.text for paragraph in doc.paragraphs])
 
+    async def _match_jobs(self, jobs: List[Dict]) -> None:
+        """Match jobs to the resume in batches, running several batches at once."""
+        batch_size = self.config.get('match_batch_size', 10)
+        semaphore = asyncio.Semaphore(self.config.get('match_concurrency', 8))
+
+        async def bounded_match(batch: List[Dict]) -> None:
+            job_descs = [job['description'] for job in batch]
+            async with semaphore:
+                try:
+                    match_results = await self.resume_matcher.match_jobs_to_resume(
+                        job_descs, 
+                        self.resume_text
+                    )
+                    for job, match_result in zip(batch, match_results):
+                        job.update(match_result)
+                except Exception as e:
+                    logging.error(f"Error in resume matching: {e}")
+
+        tasks = [
+            asyncio.create_task(bounded_match(jobs[start:start + batch_size]))
+            for start in range(0, len(jobs), batch_size)
+        ]
+        await asyncio.gather(*tasks)
+
     def run_pipeline(self):
         try:
-            # 1. Fetch jobs
-            logging.info("Fetching jobs...")
+            # 1. Fetch jobs posted since the newest one we already have
+            last_created = self.job_manager.get_last_created()
+            logging.info(f"Fetching jobs created since {last_created}..." if last_created else "Fetching jobs...")
             jobs = self.job_fetcher.fetch_all_jobs(
                 what=self.config['search_query'],
                 where=self.config['location'],
-                max_results=self.config['max_jobs']
+                max_results=self.config['max_jobs'],
+                since=last_created
             )
             
-            # 2. Match jobs with rate limiting
+            # 2. Match jobs in concurrent batches
             logging.info("Matching jobs to resume...")
-            for job in jobs:
-                try:
-                    match_result = self.resume_matcher.match_job_to_resume(
-                        job['description'], 
-                        self.resume_text
-                    )
-                    job.update(match_result)
-                    time.sleep(1)  # Add 1 second delay between API calls
-                except Exception as e:
-                    logging.error(f"Error in resume matching: {e}")
-                    if "429" in str(e):  # Rate limit hit
-                        logging.info("Rate limit reached, waiting 60 seconds...")
-                        time.sleep(60)
-                        try:
-                            match_result = self.resume_matcher.match_job_to_resume(
-                                job['description'], 
-                                self.resume_text
-                            )
-                            job.update(match_result)
-                        except Exception as retry_e:
-                            logging.error(f"Retry failed: {retry_e}")
-                            continue
+            self.match_loop.run_until_complete(self._match_jobs(jobs))
 
-            # 3. Save new jobs to CSV
+            # 3. Save new jobs to the job store
             self.job_manager.save_new_jobs(jobs)
             logging.info(f"Pipeline completed. Processed {len(jobs)} jobs.")
 
@@ -75,8 +88,12 @@ def main():
         'search_query': "Machine Learning Engineer",
         'location': "us",
         'resume_path': str(Path.home() / "OneDrive" / "Documents" / "Kamal_resume_MLE.docx"),
-        'output_csv': "job_listings.csv",
-        'max_jobs': 1000
+        'output_path': "job_listings.csv",  # or a .parquet dataset
+        'max_jobs': 1000,
+        'match_batch_size': 10,  # Job descriptions per LLM call
+        'match_concurrency': 8,  # LLM calls in flight at once
+        'match_cache_path': "match_cache.db",
+        'llm_requests_per_minute': None  # Set to the provider's quota to space out calls
     }
 
     pipeline = JobSearchPipeline(config)
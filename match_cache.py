@@ -0,0 +1,61 @@
+import json
+import sqlite3
+from typing import Dict, Iterable, List, Tuple
+
+class MatchCache:
+    """
+    Persistent cache of resume match results, keyed by a hash of
+    (resume, job description), so re-runs skip jobs that were already matched
+    """
+    def __init__(self, db_path: str = "match_cache.db"):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS matches (
+                key TEXT PRIMARY KEY,
+                score INT,
+                matching_skills JSON,
+                missing_skills JSON
+            )
+            """
+        )
+        self.conn.commit()
+
+    def get_many(self, keys: List[str]) -> Dict[str, Dict]:
+        """Get cached results for the given keys, omitting misses"""
+        if not keys:
+            return {}
+
+        placeholders = ", ".join("?" for _ in keys)
+        rows = self.conn.execute(
+            f"SELECT key, score, matching_skills, missing_skills FROM matches WHERE key IN ({placeholders})",
+            keys
+        ).fetchall()
+        return {
+            key: {
+                "score": score,
+                "matching_skills": json.loads(matching_skills),
+                "missing_skills": json.loads(missing_skills)
+            }
+            for key, score, matching_skills, missing_skills in rows
+        }
+
+    def put_many(self, items: Iterable[Tuple[str, Dict]]) -> None:
+        """Store (key, result) pairs, replacing any existing entries"""
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO matches (key, score, matching_skills, missing_skills) VALUES (?, ?, ?, ?)",
+            [
+                (
+                    key,
+                    result["score"],
+                    json.dumps(result["matching_skills"]),
+                    json.dumps(result["missing_skills"])
+                )
+                for key, result in items
+            ]
+        )
+        self.conn.commit()
+
+    def close(self) -> None:
+        self.conn.close()
@@ -1,90 +1,243 @@
 import google.generativeai as genai
-from typing import Dict
+from typing import Dict, List, Optional
 import os
-import json
+import orjson
 from dotenv import load_dotenv
+import asyncio
+import hashlib
 import time
-import random
+
+from match_cache import MatchCache
+from utils import backoff
 
 load_dotenv()
 
+def _balanced_span(text: str, start: int) -> Optional[str]:
+    """
+    Return the balanced bracket span of text beginning at start, if any.
+    Tracks bracket depth and skips brackets inside strings.
+    """
+    depth = 0
+    in_string = False
+    escaped = False
+    for i in range(start, len(text)):
+        char = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in '[{':
+            depth += 1
+        elif char in ']}':
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1]
+    return None
+
+def _next_opener(text: str, pos: int) -> int:
+    """Index of the next '[' or '{' at or after pos, or -1"""
+    openers = [i for i in (text.find('[', pos), text.find('{', pos)) if i != -1]
+    return min(openers) if openers else -1
+
+def _extract_json_array(text: str, num_jobs: int) -> Optional[List[Dict]]:
+    """
+    Return the first JSON array of num_jobs objects found in text; a single
+    top-level object is accepted when one result is expected.
+    Bracketed prose (e.g. "jobs [0-1]") is skipped by retrying at the next
+    bracket, and valid JSON of the wrong shape (e.g. an empty list) is
+    skipped as a whole so its contents aren't mistaken for the answer.
+    """
+    start = _next_opener(text, 0)
+    while start != -1:
+        json_str = _balanced_span(text, start)
+        value = None
+        if json_str is not None:
+            try:
+                value = orjson.loads(json_str)
+            except orjson.JSONDecodeError:
+                json_str = None
+
+        if isinstance(value, dict) and num_jobs == 1:
+            return [value]
+        if (
+            isinstance(value, list)
+            and len(value) == num_jobs
+            and all(isinstance(item, dict) for item in value)
+        ):
+            return value
+
+        start = _next_opener(text, start + len(json_str) if json_str is not None else start + 1)
+    return None
+
 class ResumeMatchEngine:
-    def __init__(self):
+    def __init__(self, cache: Optional[MatchCache] = None, requests_per_minute: Optional[float] = None):
         self.api_key = os.getenv("GOOGLE_API_KEY")
         genai.configure(api_key=self.api_key)
         self.model = genai.GenerativeModel('gemini-2.0-flash')
         self.max_retries = 5
         self.base_delay = 2  # Base delay in seconds
+        self.cache = cache
+        self._resume_hash = (None, None)  # (resume_text, sha256 hex digest)
+        # Optional client-side spacing between calls; None relies on 429 backoff alone
+        self.requests_per_minute = requests_per_minute
+        self._next_request_at = 0.0  # Monotonic time the next call may start
+
+    async def _wait_for_request_slot(self) -> None:
+        """Space out calls to stay under requests_per_minute, if set."""
+        if not self.requests_per_minute:
+            return
+        now = time.monotonic()
+        start_at = max(now, self._next_request_at)
+        self._next_request_at = start_at + 60 / self.requests_per_minute
+        if start_at > now:
+            await asyncio.sleep(start_at - now)
+
+    def _hash_resume(self, resume_text: str) -> str:
+        """Hash the resume once and reuse it while the text is unchanged."""
+        if self._resume_hash[0] != resume_text:
+            self._resume_hash = (resume_text, hashlib.sha256(resume_text.encode()).hexdigest())
+        return self._resume_hash[1]
+
+    def _cache_key(self, resume_hash: str, job_desc: str) -> str:
+        return hashlib.sha256((resume_hash + str(job_desc)).encode()).hexdigest()
 
-    def _exponential_backoff(self, retry_count: int) -> float:
-        """Calculate exponential backoff time with jitter."""
-        delay = min(300, self.base_delay * (2 ** retry_count))  # Cap at 5 minutes
-        jitter = random.uniform(0, 0.1 * delay)  # Add 0-10% jitter
-        return delay + jitter
+    def _error_result(self, error: str) -> Dict:
+        return {
+            "score": 0,
+            "matching_skills": [],
+            "missing_skills": [],
+            "error": error
+        }
 
-    def match_job_to_resume(self, job_desc: str, resume_text: str) -> Dict:
+    def _server_retry_delay(self, error: Exception) -> Optional[float]:
+        """Retry delay requested by the API in a rate limit error, if any."""
+        for detail in getattr(error, 'details', None) or []:
+            retry_delay = getattr(detail, 'retry_delay', None)
+            if retry_delay is not None:
+                return retry_delay.seconds + retry_delay.nanos / 1e9
+        return None
+
+    def _validate_results(self, results: List[Dict], num_jobs: int) -> List[Dict]:
         """
-        Match a job description against a resume using Google's Gemini Pro model.
-        Includes rate limit handling with exponential backoff.
+        Check the types of each result and order them by their index field.
+        Raises ValueError so malformed results are never cached or saved.
+        """
+        ordered = [None] * num_jobs
+        for position, result in enumerate(results):
+            index = result.get("index")
+            if index is None and num_jobs == 1:
+                index = position
+            if not isinstance(index, int) or isinstance(index, bool) or not 0 <= index < num_jobs:
+                raise ValueError(f"Invalid index in response: {index!r}")
+            if ordered[index] is not None:
+                raise ValueError(f"Duplicate index in response: {index}")
+
+            score = result.get("score")
+            if not isinstance(score, (int, float)) or isinstance(score, bool):
+                raise ValueError(f"Invalid score in response: {score!r}")
+            for field in ['matching_skills', 'missing_skills']:
+                skills = result.get(field)
+                if not isinstance(skills, list) or not all(isinstance(skill, str) for skill in skills):
+                    raise ValueError(f"Invalid {field} in response: {skills!r}")
+
+            ordered[index] = {
+                "score": score,
+                "matching_skills": result["matching_skills"],
+                "missing_skills": result["missing_skills"]
+            }
+        return ordered
+
+    async def match_job_to_resume(self, job_desc: str, resume_text: str) -> Dict:
+        """
+        Match a single job description against a resume.
         
         Returns:
             Dict containing match score and detailed feedback
         """
+        return (await self.match_jobs_to_resume([job_desc], resume_text))[0]
+
+    async def match_jobs_to_resume(self, job_descs: List[str], resume_text: str) -> List[Dict]:
+        """
+        Match a batch of job descriptions against a resume in a single call to
+        Google's Gemini model, so the resume is only sent once per batch.
+        Jobs already matched against this resume are served from the cache.
+        Includes rate limit handling with exponential backoff.
+        
+        Returns:
+            List of dicts containing match score and detailed feedback,
+            in the same order as job_descs
+        """
+        if self.cache is None:
+            return await self._match_uncached(job_descs, resume_text)
+
+        resume_hash = self._hash_resume(resume_text)
+        keys = [self._cache_key(resume_hash, job_desc) for job_desc in job_descs]
+        cached = self.cache.get_many(keys)
+
+        misses = [i for i, key in enumerate(keys) if key not in cached]
+        if misses:
+            fresh = await self._match_uncached([job_descs[i] for i in misses], resume_text)
+            for i, result in zip(misses, fresh):
+                cached[keys[i]] = result
+            # Only cache successful matches so failures are retried next run
+            self.cache.put_many(
+                (keys[i], result) for i, result in zip(misses, fresh) if "error" not in result
+            )
+
+        return [cached[key] for key in keys]
+
+    async def _match_uncached(self, job_descs: List[str], resume_text: str) -> List[Dict]:
         retry_count = 0
+        num_jobs = len(job_descs)
         
         while retry_count < self.max_retries:
             try:
+                jobs_text = "\n\n".join(
+                    f"JOB {i}:\n{job_desc}" for i, job_desc in enumerate(job_descs)
+                )
                 prompt = f"""
-                Analyze the following job description and resume for compatibility:
+                Analyze the following {num_jobs} job descriptions, numbered 0 to {num_jobs - 1}, and resume for compatibility:
                 
-                JOB DESCRIPTION:
-                {job_desc}
+                JOB DESCRIPTIONS:
+                {jobs_text}
 
                 RESUME:
                 {resume_text}
 
-                Provide the following in your response:
+                For each job description, provide the following:
                 1. A match score from 0 to 100
                 2. Key matching skills
                 3. Missing skills or qualifications
                 
-                Return your response strictly in the following JSON format:
-                {{
-                    "score": <number>,
-                    "matching_skills": [<list of strings>],
-                    "missing_skills": [<list of strings>]
-                }}
+                Return your response strictly as a JSON array of {num_jobs} objects,
+                in the same order as the job descriptions, in the following format:
+                [
+                    {{
+                        "index": <job description number>,
+                        "score": <number>,
+                        "matching_skills": [<list of strings>],
+                        "missing_skills": [<list of strings>]
+                    }}
+                ]
                 """
 
-                response = self.model.generate_content(prompt)
+                await self._wait_for_request_slot()
+                response = await self.model.generate_content_async(prompt)
                 #print("Raw response:", response.text)
                 
                 # Clean and validate the response
-                try:
-                    text = response.text
-                    start = text.find('{')
-                    end = text.rfind('}') + 1
-                    if start != -1 and end != 0:
-                        json_str = text[start:end]
-                        result = json.loads(json_str)
-                    else:
-                        raise ValueError("No JSON object found in response")
-                        
-                    required_fields = ['score', 'matching_skills', 'missing_skills']
-                    if not all(field in result for field in required_fields):
-                        raise ValueError("Missing required fields in response")
-                        
-                    return result
-                    
-                except json.JSONDecodeError as e:
-                    print(f"JSON parsing error: {e}")
+                text = response.text
+                results = _extract_json_array(text, num_jobs)
+                if results is None:
                     print(f"Attempted to parse: {text}")
-                    return {
-                        "score": 0,
-                        "matching_skills": [],
-                        "missing_skills": [],
-                        "error": "Failed to parse LLM response"
-                    }
+                    return [self._error_result("Failed to parse LLM response") for _ in job_descs]
+                
+                return self._validate_results(results, num_jobs)
                     
             except Exception as e:
                 error_str = str(e)
@@ -93,26 +246,18 @@ class ResumeMatchEngine:
                 # Check if it's a rate limit error
                 if "429" in error_str:
                     if retry_count < self.max_retries - 1:  # If we still have retries left
-                        delay = self._exponential_backoff(retry_count)
+                        delay = self._server_retry_delay(e)
+                        if delay is None:
+                            delay = backoff(retry_count, base=self.base_delay)  # Cap at 5 minutes
                         print(f"Rate limit hit. Waiting {delay:.2f} seconds before retry...")
-                        time.sleep(delay)
+                        await asyncio.sleep(delay)
                         retry_count += 1
                         continue
                     else:
                         print("Max retries reached for rate limit.")
                 
                 # For non-rate-limit errors or if max retries reached
-                return {
-                    "score": 0,
-                    "matching_skills": [],
-                    "missing_skills": [],
-                    "error": error_str
-                }
+                return [self._error_result(error_str) for _ in job_descs]
         
         # If we've exhausted all retries
-        return {
-            "score": 0,
-            "matching_skills": [],
-            "missing_skills": [],
-            "error": "Max retries reached"
-        }
+        return [self._error_result("Max retries reached") for _ in job_descs]
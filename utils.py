@@ -0,0 +1,17 @@
+import random
+
+def backoff(attempt: int, base: float = 1.0, cap: float = 300, jitter: float = 0.1) -> float:
+    """
+    Calculate exponential backoff time with jitter.
+
+    Args:
+        attempt: Zero-based retry attempt number
+        base: Delay for the first retry in seconds
+        cap: Maximum delay before jitter in seconds
+        jitter: Fraction of the delay added as random jitter
+
+    Returns:
+        Seconds to wait before the next attempt
+    """
+    delay = min(cap, base * (2 ** attempt))
+    return delay + random.uniform(0, jitter * delay)